@@ -7,22 +7,28 @@ from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import GetOrdersRequest
 from alpaca.trading.enums import QueryOrderStatus, OrderType
 
-# --- Conexión (paper) ---
-API_KEY = os.environ["APCA_API_KEY_ID"]
-API_SECRET = os.environ["APCA_API_SECRET_KEY"]
-client = TradingClient(API_KEY, API_SECRET, paper=True)
+# --- Conexión (paper) — se crea al primer uso, importar el módulo no tiene efectos ---
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        API_KEY = os.environ["APCA_API_KEY_ID"]
+        API_SECRET = os.environ["APCA_API_SECRET_KEY"]
+        _client = TradingClient(API_KEY, API_SECRET, paper=True)
+    return _client
 
 # --- Paths ---
 ROOT = pathlib.Path(__file__).resolve().parent
 DOCS = ROOT / "docs"
 DATA = ROOT / "data"
-DOCS.mkdir(exist_ok=True)
-DATA.mkdir(exist_ok=True)
 
 HIST_EQUITY = DATA / "equity_history.csv"
 HIST_POS = DATA / "pos_history.csv"    # histórico por símbolo
 OUT_HTML = DOCS / "index.html"
 
+MAX_POINTS_PER_SYMBOL = 5000
+
 def d2(x):
     return float(Decimal(str(x)).quantize(Decimal("0.01")))
 
@@ -30,252 +36,283 @@ def now_iso():
     return datetime.datetime.utcnow().replace(microsecond=0).isoformat()+"Z"
 
 # --- Datos de cuenta/posiciones/órdenes ---
-account = client.get_account()
-positions = client.get_all_positions()
-open_orders = client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN))
-
-timestamp = now_iso()
-portfolio_value = float(account.portfolio_value)
-cash = float(account.cash)
-buying_power = float(account.buying_power)
-last_equity = float(account.last_equity) if account.last_equity is not None else portfolio_value
+def fetch_account_data():
+    client = get_client()
+    account = client.get_account()
+    positions = client.get_all_positions()
+    open_orders = client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN))
+    return account, positions, open_orders
+
+def account_kpis(account):
+    portfolio_value = float(account.portfolio_value)
+    return {
+        "portfolio_value": portfolio_value,
+        "cash": float(account.cash),
+        "buying_power": float(account.buying_power),
+        "last_equity": float(account.last_equity) if account.last_equity is not None else portfolio_value,
+    }
 
 # --- Actualizar equity_history.csv (intraday) ---
-write_header_eq = not HIST_EQUITY.exists()
-append_eq = True
-if HIST_EQUITY.exists():
-    try:
-        with HIST_EQUITY.open("r", newline="") as f:
-            rows = list(csv.reader(f))
-            if rows and rows[-1] and rows[-1][0] == timestamp:
-                append_eq = False
-    except Exception:
-        pass
-
-if append_eq:
-    with HIST_EQUITY.open("a", newline="") as f:
-        w = csv.writer(f)
-        if write_header_eq:
-            w.writerow(["timestamp","portfolio_value","last_equity","cash","buying_power"])
-        w.writerow([timestamp, f"{portfolio_value:.2f}", f"{last_equity:.2f}", f"{cash:.2f}", f"{buying_power:.2f}"])
+def append_equity_history(timestamp, kpis):
+    write_header_eq = not HIST_EQUITY.exists()
+    append_eq = True
+    if HIST_EQUITY.exists():
+        try:
+            with HIST_EQUITY.open("r", newline="") as f:
+                rows = list(csv.reader(f))
+                if rows and rows[-1] and rows[-1][0] == timestamp:
+                    append_eq = False
+        except Exception:
+            pass
+
+    if append_eq:
+        with HIST_EQUITY.open("a", newline="") as f:
+            w = csv.writer(f)
+            if write_header_eq:
+                w.writerow(["timestamp","portfolio_value","last_equity","cash","buying_power"])
+            w.writerow([timestamp, f"{kpis['portfolio_value']:.2f}", f"{kpis['last_equity']:.2f}",
+                        f"{kpis['cash']:.2f}", f"{kpis['buying_power']:.2f}"])
 
 # --- Actualizar pos_history.csv (una fila por símbolo) ---
-write_header_pos = not HIST_POS.exists()
-with HIST_POS.open("a", newline="") as f:
-    w = csv.writer(f)
-    if write_header_pos:
-        w.writerow(["timestamp","symbol","qty","avg_entry","current","market_value","unreal_pl","unreal_plpc"])
-    for p in positions:
-        w.writerow([
-            timestamp,
-            p.symbol,
-            f"{float(p.qty):.8f}",
-            f"{d2(p.avg_entry_price):.2f}",
-            f"{d2(p.current_price):.2f}",
-            f"{d2(p.market_value):.2f}",
-            f"{d2(p.unrealized_pl) if p.unrealized_pl is not None else 0.0:.2f}",
-            f"{float(p.unrealized_plpc) if p.unrealized_plpc is not None else 0.0:.6f}",
-        ])
+def append_pos_history(timestamp, positions):
+    write_header_pos = not HIST_POS.exists()
+    with HIST_POS.open("a", newline="") as f:
+        w = csv.writer(f)
+        if write_header_pos:
+            w.writerow(["timestamp","symbol","qty","avg_entry","current","market_value","unreal_pl","unreal_plpc"])
+        for p in positions:
+            w.writerow([
+                timestamp,
+                p.symbol,
+                f"{float(p.qty):.8f}",
+                f"{d2(p.avg_entry_price):.2f}",
+                f"{d2(p.current_price):.2f}",
+                f"{d2(p.market_value):.2f}",
+                f"{d2(p.unrealized_pl) if p.unrealized_pl is not None else 0.0:.2f}",
+                f"{float(p.unrealized_plpc) if p.unrealized_plpc is not None else 0.0:.6f}",
+            ])
 
 # --- Preparar datos actuales para tablas ---
-pos_rows = []
-for p in positions:
-    pos_rows.append({
-        "symbol": p.symbol,
-        "qty": float(p.qty),
-        "avg_entry": d2(p.avg_entry_price),
-        "current": d2(p.current_price),
-        "market_value": d2(p.market_value),
-        "unreal_pl": d2(p.unrealized_pl) if p.unrealized_pl is not None else 0.0,
-        "unreal_plpc": float(p.unrealized_plpc) if p.unrealized_plpc is not None else 0.0,
-    })
+def build_pos_rows(positions):
+    pos_rows = []
+    for p in positions:
+        pos_rows.append({
+            "symbol": p.symbol,
+            "qty": float(p.qty),
+            "avg_entry": d2(p.avg_entry_price),
+            "current": d2(p.current_price),
+            "market_value": d2(p.market_value),
+            "unreal_pl": d2(p.unrealized_pl) if p.unrealized_pl is not None else 0.0,
+            "unreal_plpc": float(p.unrealized_plpc) if p.unrealized_plpc is not None else 0.0,
+        })
+    return pos_rows
 
 # Órdenes abiertas → trailing / stop / general
-orders_rows, trailing_rows, fixed_stop_rows = [], [], []
-for o in open_orders:
-    oid = o.id
-    sym = o.symbol
-    side = getattr(o, "side", None).value if getattr(o, "side", None) else ""
-    otype = getattr(o, "type", None).value if getattr(o, "type", None) else ""
-    qty = float(getattr(o, "qty", 0.0)) if getattr(o, "qty", None) is not None else None
-    status = getattr(o, "status", None).value if getattr(o, "status", None) else ""
-    submitted_at = o.submitted_at.isoformat() if getattr(o, "submitted_at", None) else ""
-
-    orders_rows.append({
-        "id": oid, "symbol": sym, "side": side, "type": otype,
-        "qty": qty, "status": status, "submitted_at": submitted_at
-    })
-
-    if getattr(o, "type", None) == OrderType.TRAILING_STOP:
-        trail_percent = getattr(o, "trail_percent", None)
-        trail_price = getattr(o, "trail_price", None)  # puede venir None en paper
-        trailing_rows.append({
-            "id": oid, "symbol": sym, "qty": qty,
-            "trail_percent": float(trail_percent) if trail_percent is not None else None,
-            "trail_price": d2(trail_price) if trail_price is not None else None,
-            "status": status, "submitted_at": submitted_at
+def build_order_rows(open_orders):
+    orders_rows, trailing_rows, fixed_stop_rows = [], [], []
+    for o in open_orders:
+        oid = str(o.id)
+        sym = o.symbol
+        side = getattr(o, "side", None).value if getattr(o, "side", None) else ""
+        otype = getattr(o, "type", None).value if getattr(o, "type", None) else ""
+        qty = float(getattr(o, "qty", 0.0)) if getattr(o, "qty", None) is not None else None
+        status = getattr(o, "status", None).value if getattr(o, "status", None) else ""
+        submitted_at = o.submitted_at.isoformat() if getattr(o, "submitted_at", None) else ""
+
+        orders_rows.append({
+            "id": oid, "symbol": sym, "side": side, "type": otype,
+            "qty": qty, "status": status, "submitted_at": submitted_at
         })
 
-    if getattr(o, "type", None) == OrderType.STOP:
-        stop_price = getattr(o, "stop_price", None)
-        fixed_stop_rows.append({
-            "id": oid, "symbol": sym, "qty": qty,
-            "stop_price": d2(stop_price) if stop_price is not None else None,
-            "status": status, "submitted_at": submitted_at
-        })
+        if getattr(o, "type", None) == OrderType.TRAILING_STOP:
+            trail_percent = getattr(o, "trail_percent", None)
+            trail_price = getattr(o, "trail_price", None)  # puede venir None en paper
+            trailing_rows.append({
+                "id": oid, "symbol": sym, "qty": qty,
+                "trail_percent": float(trail_percent) if trail_percent is not None else None,
+                "trail_price": d2(trail_price) if trail_price is not None else None,
+                "status": status, "submitted_at": submitted_at
+            })
+
+        if getattr(o, "type", None) == OrderType.STOP:
+            stop_price = getattr(o, "stop_price", None)
+            fixed_stop_rows.append({
+                "id": oid, "symbol": sym, "qty": qty,
+                "stop_price": d2(stop_price) if stop_price is not None else None,
+                "status": status, "submitted_at": submitted_at
+            })
+    return orders_rows, trailing_rows, fixed_stop_rows
 
 # --- Cargar históricos para gráficos ---
-equity_labels_intraday, equity_values_intraday = [], []
-if HIST_EQUITY.exists():
-    with HIST_EQUITY.open("r", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            equity_labels_intraday.append(row["timestamp"])
-            equity_values_intraday.append(float(row["portfolio_value"]))
-
-# Serie diaria (último valor por fecha UTC)
-daily_last_by_date = {}
-if HIST_EQUITY.exists():
-    with HIST_EQUITY.open("r", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            date = row["timestamp"][:10]
-            daily_last_by_date[date] = float(row["portfolio_value"])
-equity_labels_daily = sorted(daily_last_by_date.keys())
-equity_values_daily = [daily_last_by_date[d] for d in equity_labels_daily]
+def load_equity_history():
+    equity_labels_intraday, equity_values_intraday = [], []
+    # Serie diaria (último valor por fecha UTC)
+    daily_last_by_date = {}
+    if HIST_EQUITY.exists():
+        with HIST_EQUITY.open("r", newline="") as f:
+            r = csv.DictReader(f)
+            for row in r:
+                equity_labels_intraday.append(row["timestamp"])
+                equity_values_intraday.append(float(row["portfolio_value"]))
+                daily_last_by_date[row["timestamp"][:10]] = float(row["portfolio_value"])
+    return equity_labels_intraday, equity_values_intraday, daily_last_by_date
+
+def daily_series(daily_last_by_date):
+    equity_labels_daily = sorted(daily_last_by_date.keys())
+    equity_values_daily = [daily_last_by_date[d] for d in equity_labels_daily]
+    return equity_labels_daily, equity_values_daily
 
 # Por símbolo: históricos para gráfico individual + para trailing detail
-MAX_POINTS_PER_SYMBOL = 5000
-symbol_series = defaultdict(lambda: {"t": deque(maxlen=MAX_POINTS_PER_SYMBOL),
-                                     "price": deque(maxlen=MAX_POINTS_PER_SYMBOL),
-                                     "plpc": deque(maxlen=MAX_POINTS_PER_SYMBOL)})
-if HIST_POS.exists():
-    with HIST_POS.open("r", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            sym = row["symbol"]
-            symbol_series[sym]["t"].append(row["timestamp"])
-            symbol_series[sym]["price"].append(float(row["current"]))
-            symbol_series[sym]["plpc"].append(float(row["unreal_plpc"]) * 100.0)
-
-symbol_history = {sym: {"t": list(ser["t"]), "price": list(ser["price"]), "plpc": list(ser["plpc"])}
-                  for sym, ser in symbol_series.items()}
+# (maxlen=None → serie completa, sin recortar)
+def new_symbol_series(maxlen=MAX_POINTS_PER_SYMBOL):
+    return defaultdict(lambda: {"t": deque(maxlen=maxlen),
+                                "price": deque(maxlen=maxlen),
+                                "plpc": deque(maxlen=maxlen)})
+
+def load_symbol_series(maxlen=MAX_POINTS_PER_SYMBOL):
+    symbol_series = new_symbol_series(maxlen)
+    if HIST_POS.exists():
+        with HIST_POS.open("r", newline="") as f:
+            r = csv.DictReader(f)
+            for row in r:
+                sym = row["symbol"]
+                symbol_series[sym]["t"].append(row["timestamp"])
+                symbol_series[sym]["price"].append(float(row["current"]))
+                symbol_series[sym]["plpc"].append(float(row["unreal_plpc"]) * 100.0)
+    return symbol_series
+
+def series_point(timestamp, pos_row):
+    # mismo redondeo que una fila leída de pos_history.csv
+    return timestamp, pos_row["current"], float(f"{pos_row['unreal_plpc']:.6f}") * 100.0
+
+def symbol_history_from(symbol_series, symbols=None):
+    return {sym: {"t": list(ser["t"]), "price": list(ser["price"]), "plpc": list(ser["plpc"])}
+            for sym, ser in symbol_series.items() if symbols is None or sym in symbols}
 
 # --- Trailing detail: High-Water & Dynamic Stop por símbolo ---
-trailing_detail = []
-for tr in trailing_rows:
-    sym = tr["symbol"]
+def high_water_since(symbol_history, sym, submitted):
+    if sym not in symbol_history or not submitted:
+        return None
+    tlist = symbol_history[sym]["t"]
+    plist = symbol_history[sym]["price"]
+    # encontrar índice desde el primer timestamp >= submitted (sin puntos posteriores → None)
+    for i, ts in enumerate(tlist):
+        if ts >= submitted:
+            return max(plist[i:])
+    return None
+
+def trailing_detail_row(tr, high_water):
     tpct = tr["trail_percent"]
-    submitted = tr["submitted_at"]  # ISO
-    high_water = None
-    dyn_stop = None
-
-    if sym in symbol_history and tpct is not None and submitted:
-        tlist = symbol_history[sym]["t"]
-        plist = symbol_history[sym]["price"]
-        # encontrar índice desde el primer timestamp >= submitted
-        start_idx = 0
-        for i, ts in enumerate(tlist):
-            if ts >= submitted:
-                start_idx = i
-                break
-        if plist[start_idx:]:
-            high_water = max(plist[start_idx:])
-            dyn_stop = high_water * (1 - tpct / 100.0)
-
-    trailing_detail.append({
-        "symbol": sym,
+    if tpct is None:
+        high_water = None
+    dyn_stop = high_water * (1 - tpct / 100.0) if high_water is not None else None
+    return {
+        "id": tr["id"],
+        "symbol": tr["symbol"],
         "trail_percent": tpct,
-        "submitted_at": submitted,
+        "submitted_at": tr["submitted_at"],  # ISO
         "high_water": d2(high_water) if high_water is not None else None,
         "dynamic_stop": d2(dyn_stop) if dyn_stop is not None else None
-    })
+    }
+
+def build_trailing_detail(trailing_rows, symbol_history):
+    return [trailing_detail_row(tr, high_water_since(symbol_history, tr["symbol"], tr["submitted_at"]))
+            for tr in trailing_rows]
 
 # --- Protection por símbolo (para tabla y para columna en Positions) ---
-protection_by_symbol = defaultdict(list)
-for r in trailing_rows:
-    label = f"Trailing {r['trail_percent']}%" if r['trail_percent'] is not None else "Trailing"
-    protection_by_symbol[r["symbol"]].append(label)
-for r in fixed_stop_rows:
-    if r["stop_price"] is not None:
-        protection_by_symbol[r["symbol"]].append(f"Stop ${r['stop_price']:.2f}")
-    else:
-        protection_by_symbol[r["symbol"]].append("Stop")
-
-# --- Serializaciones JSON / HTML seguras ---
-EQUITY_LABELS_INTRADAY_JSON = json.dumps(equity_labels_intraday)
-EQUITY_VALUES_INTRADAY_JSON = json.dumps(equity_values_intraday)
-EQUITY_LABELS_DAILY_JSON = json.dumps(equity_labels_daily)
-EQUITY_VALUES_DAILY_JSON = json.dumps(equity_values_daily)
-SYMBOL_HISTORY_JSON = json.dumps(symbol_history)
-
-def prot_txt(sym):
+def build_protection(trailing_rows, fixed_stop_rows):
+    protection_by_symbol = defaultdict(list)
+    for r in trailing_rows:
+        label = f"Trailing {r['trail_percent']}%" if r['trail_percent'] is not None else "Trailing"
+        protection_by_symbol[r["symbol"]].append(label)
+    for r in fixed_stop_rows:
+        if r["stop_price"] is not None:
+            protection_by_symbol[r["symbol"]].append(f"Stop ${r['stop_price']:.2f}")
+        else:
+            protection_by_symbol[r["symbol"]].append("Stop")
+    return protection_by_symbol
+
+def prot_txt(protection_by_symbol, sym):
     labs = protection_by_symbol.get(sym, [])
     return " · ".join(labs) if labs else "None"
 
-POS_TBODY_HTML = "".join(
-    f"<tr><td>{r['symbol']}</td>"
-    f"<td>{r['qty']:.6g}</td>"
-    f"<td>${r['avg_entry']:,.2f}</td>"
-    f"<td>${r['current']:,.2f}</td>"
-    f"<td>${r['market_value']:,.2f}</td>"
-    f"<td class='{'pos' if r['unreal_pl']>=0 else 'neg'}'>${r['unreal_pl']:,.2f}</td>"
-    f"<td class='{'pos' if r['unreal_plpc']>=0 else 'neg'}'>{r['unreal_plpc']*100:.2f}%</td>"
-    f"<td>{prot_txt(r['symbol'])}</td></tr>"
-    for r in pos_rows
-)
-
-ORD_TBODY_HTML = "".join(
-    f"<tr><td class='muted'>{o['id']}</td>"
-    f"<td>{o['symbol']}</td>"
-    f"<td>{o['side']}</td>"
-    f"<td>{o['type']}</td>"
-    f"<td>{o['qty'] if o['qty'] is not None else ''}</td>"
-    f"<td>{o['status']}</td>"
-    f"<td>{o['submitted_at']}</td></tr>"
-    for o in orders_rows
-)
-
-TRAIL_TBODY_HTML = "".join(
-    f"<tr>"
-    f"<td class='muted'>{o['id']}</td>"
-    f"<td>{o['symbol']}</td>"
-    f"<td>{o['qty'] if o['qty'] is not None else ''}</td>"
-    f"<td>{(str(o['trail_percent'])+'%') if o['trail_percent'] is not None else ''}</td>"
-    f"<td>{('$'+format(o['trail_price'],',.2f')) if o['trail_price'] is not None else ''}</td>"
-    f"<td>{o['status']}</td>"
-    f"<td>{o['submitted_at']}</td>"
-    f"</tr>"
-    for o in trailing_rows
-)
-
-STOP_TBODY_HTML = "".join(
-    f"<tr>"
-    f"<td class='muted'>{o['id']}</td>"
-    f"<td>{o['symbol']}</td>"
-    f"<td>{o['qty'] if o['qty'] is not None else ''}</td>"
-    f"<td>{('$'+format(o['stop_price'],',.2f')) if o['stop_price'] is not None else ''}</td>"
-    f"<td>{o['status']}</td>"
-    f"<td>{o['submitted_at']}</td>"
-    f"</tr>"
-    for o in fixed_stop_rows
-)
-
-TRAIL_DETAIL_TBODY_HTML = "".join(
-    f"<tr>"
-    f"<td>{d['symbol']}</td>"
-    f"<td>{(str(d['trail_percent'])+'%') if d['trail_percent'] is not None else ''}</td>"
-    f"<td>{d['submitted_at']}</td>"
-    f"<td>{('$'+format(d['high_water'],',.2f')) if d['high_water'] is not None else ''}</td>"
-    f"<td>{('$'+format(d['dynamic_stop'],',.2f')) if d['dynamic_stop'] is not None else ''}</td>"
-    f"</tr>"
-    for d in trailing_detail
-)
-
-PORTFOLIO_VALUE_TXT = f"${portfolio_value:,.2f}"
-LAST_EQUITY_TXT = f"${last_equity:,.2f}"
-CASH_TXT = f"${cash:,.2f}"
-BUYING_POWER_TXT = f"${buying_power:,.2f}"
+# --- Filas HTML (una <tr> por fila, con data-key para actualizaciones en vivo) ---
+def pos_row_html(r, protection_by_symbol):
+    return (
+        f"<tr data-key='{r['symbol']}'><td>{r['symbol']}</td>"
+        f"<td>{r['qty']:.6g}</td>"
+        f"<td>${r['avg_entry']:,.2f}</td>"
+        f"<td>${r['current']:,.2f}</td>"
+        f"<td>${r['market_value']:,.2f}</td>"
+        f"<td class='{'pos' if r['unreal_pl']>=0 else 'neg'}'>${r['unreal_pl']:,.2f}</td>"
+        f"<td class='{'pos' if r['unreal_plpc']>=0 else 'neg'}'>{r['unreal_plpc']*100:.2f}%</td>"
+        f"<td>{prot_txt(protection_by_symbol, r['symbol'])}</td></tr>"
+    )
+
+def order_row_html(o):
+    return (
+        f"<tr data-key='{o['id']}'><td class='muted'>{o['id']}</td>"
+        f"<td>{o['symbol']}</td>"
+        f"<td>{o['side']}</td>"
+        f"<td>{o['type']}</td>"
+        f"<td>{o['qty'] if o['qty'] is not None else ''}</td>"
+        f"<td>{o['status']}</td>"
+        f"<td>{o['submitted_at']}</td></tr>"
+    )
+
+def trail_row_html(o):
+    return (
+        f"<tr data-key='{o['id']}'>"
+        f"<td class='muted'>{o['id']}</td>"
+        f"<td>{o['symbol']}</td>"
+        f"<td>{o['qty'] if o['qty'] is not None else ''}</td>"
+        f"<td>{(str(o['trail_percent'])+'%') if o['trail_percent'] is not None else ''}</td>"
+        f"<td>{('$'+format(o['trail_price'],',.2f')) if o['trail_price'] is not None else ''}</td>"
+        f"<td>{o['status']}</td>"
+        f"<td>{o['submitted_at']}</td>"
+        f"</tr>"
+    )
+
+def stop_row_html(o):
+    return (
+        f"<tr data-key='{o['id']}'>"
+        f"<td class='muted'>{o['id']}</td>"
+        f"<td>{o['symbol']}</td>"
+        f"<td>{o['qty'] if o['qty'] is not None else ''}</td>"
+        f"<td>{('$'+format(o['stop_price'],',.2f')) if o['stop_price'] is not None else ''}</td>"
+        f"<td>{o['status']}</td>"
+        f"<td>{o['submitted_at']}</td>"
+        f"</tr>"
+    )
+
+def trail_detail_row_html(d):
+    return (
+        f"<tr data-key='{d['id']}'>"
+        f"<td>{d['symbol']}</td>"
+        f"<td>{(str(d['trail_percent'])+'%') if d['trail_percent'] is not None else ''}</td>"
+        f"<td>{d['submitted_at']}</td>"
+        f"<td>{('$'+format(d['high_water'],',.2f')) if d['high_water'] is not None else ''}</td>"
+        f"<td>{('$'+format(d['dynamic_stop'],',.2f')) if d['dynamic_stop'] is not None else ''}</td>"
+        f"</tr>"
+    )
+
+def build_table_rows(pos_rows, orders_rows, trailing_rows, fixed_stop_rows, trailing_detail, protection_by_symbol):
+    """Tablas como listas ordenadas de (key, <tr>) — base del HTML estático y de los deltas en vivo."""
+    return {
+        "pos": [(r["symbol"], pos_row_html(r, protection_by_symbol)) for r in pos_rows],
+        "ord": [(o["id"], order_row_html(o)) for o in orders_rows],
+        "trail": [(o["id"], trail_row_html(o)) for o in trailing_rows],
+        "stop": [(o["id"], stop_row_html(o)) for o in fixed_stop_rows],
+        "trail_detail": [(d["id"], trail_detail_row_html(d)) for d in trailing_detail],
+    }
+
+def kpi_texts(kpis):
+    return {
+        "portfolio_value": f"${kpis['portfolio_value']:,.2f}",
+        "last_equity": f"${kpis['last_equity']:,.2f}",
+        "cash": f"${kpis['cash']:,.2f}",
+        "buying_power": f"${kpis['buying_power']:,.2f}",
+    }
 
 # --- Template HTML (sin f-strings en HTML) ---
 html_template = """
@@ -330,7 +367,7 @@ html_template = """
   <header>
     <div>
       <h1>Alpaca Paper Dashboard</h1>
-      <div class="muted">Last update: __TIMESTAMP__ (UTC)</div>
+      <div class="muted">Last update: <span id="lastUpdate">__TIMESTAMP__</span> (UTC)</div>
     </div>
     <div class="toolbar">
       <button id="equityToggle">Equity: Daily</button>
@@ -341,10 +378,10 @@ html_template = """
   </header>
 
   <div class="grid">
-    <div class="card kpi"><div class="label">Portfolio Value</div><div class="value">__PORTFOLIO_VALUE__</div></div>
-    <div class="card kpi"><div class="label">Last Equity (prev close)</div><div class="value">__LAST_EQUITY__</div></div>
-    <div class="card kpi"><div class="label">Cash</div><div class="value">__CASH__</div></div>
-    <div class="card kpi"><div class="label">Buying Power</div><div class="value">__BUYING_POWER__</div></div>
+    <div class="card kpi"><div class="label">Portfolio Value</div><div class="value" id="kpi_portfolio_value">__PORTFOLIO_VALUE__</div></div>
+    <div class="card kpi"><div class="label">Last Equity (prev close)</div><div class="value" id="kpi_last_equity">__LAST_EQUITY__</div></div>
+    <div class="card kpi"><div class="label">Cash</div><div class="value" id="kpi_cash">__CASH__</div></div>
+    <div class="card kpi"><div class="label">Buying Power</div><div class="value" id="kpi_buying_power">__BUYING_POWER__</div></div>
   </div>
 
   <div class="row">
@@ -366,7 +403,7 @@ html_template = """
       <thead>
         <tr><th>ID</th><th>Symbol</th><th>Qty</th><th>Trail %</th><th>Trail $</th><th>Status</th><th>Submitted</th></tr>
       </thead>
-      <tbody>
+      <tbody id="tbody_trail">
         __TRAIL_TBODY__
       </tbody>
     </table>
@@ -378,7 +415,7 @@ html_template = """
       <thead>
         <tr><th>Symbol</th><th>Trail %</th><th>Submitted</th><th>High-Water</th><th>Dynamic Stop</th></tr>
       </thead>
-      <tbody>
+      <tbody id="tbody_trail_detail">
         __TRAIL_DETAIL_TBODY__
       </tbody>
     </table>
@@ -390,7 +427,7 @@ html_template = """
       <thead>
         <tr><th>ID</th><th>Symbol</th><th>Qty</th><th>Stop $</th><th>Status</th><th>Submitted</th></tr>
       </thead>
-      <tbody>
+      <tbody id="tbody_stop">
         __STOP_TBODY__
       </tbody>
     </table>
@@ -402,7 +439,7 @@ html_template = """
       <thead>
         <tr><th>ID</th><th>Symbol</th><th>Side</th><th>Type</th><th>Qty</th><th>Status</th><th>Submitted</th></tr>
       </thead>
-      <tbody>
+      <tbody id="tbody_ord">
         __ORD_TBODY__
       </tbody>
     </table>
@@ -414,13 +451,13 @@ html_template = """
       <thead>
         <tr><th>Symbol</th><th>Qty</th><th>Avg Entry</th><th>Current</th><th>Market Value</th><th>Unreal P/L</th><th>Unreal P/L %</th><th>Protection</th></tr>
       </thead>
-      <tbody>
+      <tbody id="tbody_pos">
         __POS_TBODY__
       </tbody>
     </table>
   </div>
 
-  <div class="foot">Data: Alpaca Paper API · Static page updated by GitHub Actions · Mobile-friendly.</div>
+  <div class="foot">Data: Alpaca Paper API · __FOOTER_NOTE__ · Mobile-friendly.</div>
 </div>
 
 <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
@@ -482,28 +519,62 @@ toggleBtn.addEventListener('click', ()=>{
 });
 if (symbols.length > 0) { symSel.value = symbols[0]; renderSymbolChart(symbols[0]); }
 </script>
+__LIVE_SCRIPT__
 </body>
 </html>
 """
 
-# --- Reemplazos de tokens ---
-html = (html_template
-    .replace("__TIMESTAMP__", timestamp)
-    .replace("__PORTFOLIO_VALUE__", PORTFOLIO_VALUE_TXT)
-    .replace("__LAST_EQUITY__", LAST_EQUITY_TXT)
-    .replace("__CASH__", CASH_TXT)
-    .replace("__BUYING_POWER__", BUYING_POWER_TXT)
-    .replace("__EQUITY_LABELS_INTRADAY_JSON__", json.dumps(equity_labels_intraday))
-    .replace("__EQUITY_VALUES_INTRADAY_JSON__", json.dumps(equity_values_intraday))
-    .replace("__EQUITY_LABELS_DAILY_JSON__", json.dumps(equity_labels_daily))
-    .replace("__EQUITY_VALUES_DAILY_JSON__", json.dumps(equity_values_daily))
-    .replace("__SYMBOL_HISTORY_JSON__", json.dumps(symbol_history))
-    .replace("__ORD_TBODY__", ORD_TBODY_HTML)
-    .replace("__TRAIL_TBODY__", TRAIL_TBODY_HTML)
-    .replace("__STOP_TBODY__", STOP_TBODY_HTML)
-    .replace("__TRAIL_DETAIL_TBODY__", TRAIL_DETAIL_TBODY_HTML)
-    .replace("__POS_TBODY__", POS_TBODY_HTML)
-)
-
-OUT_HTML.write_text(html, encoding="utf-8")
-print(f"Wrote {OUT_HTML} (with trailing detail) and updated {HIST_EQUITY} / {HIST_POS}")
+def render_html(timestamp, kpis, tables, equity_labels_intraday, equity_values_intraday,
+                equity_labels_daily, equity_values_daily, symbol_history,
+                footer_note="Static page updated by GitHub Actions", live_script=""):
+    kpi_txt = kpi_texts(kpis)
+    return (html_template
+        .replace("__TIMESTAMP__", timestamp)
+        .replace("__PORTFOLIO_VALUE__", kpi_txt["portfolio_value"])
+        .replace("__LAST_EQUITY__", kpi_txt["last_equity"])
+        .replace("__CASH__", kpi_txt["cash"])
+        .replace("__BUYING_POWER__", kpi_txt["buying_power"])
+        .replace("__EQUITY_LABELS_INTRADAY_JSON__", json.dumps(equity_labels_intraday))
+        .replace("__EQUITY_VALUES_INTRADAY_JSON__", json.dumps(equity_values_intraday))
+        .replace("__EQUITY_LABELS_DAILY_JSON__", json.dumps(equity_labels_daily))
+        .replace("__EQUITY_VALUES_DAILY_JSON__", json.dumps(equity_values_daily))
+        .replace("__SYMBOL_HISTORY_JSON__", json.dumps(symbol_history))
+        .replace("__ORD_TBODY__", "".join(h for _, h in tables["ord"]))
+        .replace("__TRAIL_TBODY__", "".join(h for _, h in tables["trail"]))
+        .replace("__STOP_TBODY__", "".join(h for _, h in tables["stop"]))
+        .replace("__TRAIL_DETAIL_TBODY__", "".join(h for _, h in tables["trail_detail"]))
+        .replace("__POS_TBODY__", "".join(h for _, h in tables["pos"]))
+        .replace("__FOOTER_NOTE__", footer_note)
+        .replace("__LIVE_SCRIPT__", live_script)
+    )
+
+def main():
+    DOCS.mkdir(exist_ok=True)
+    DATA.mkdir(exist_ok=True)
+
+    account, positions, open_orders = fetch_account_data()
+    timestamp = now_iso()
+    kpis = account_kpis(account)
+
+    append_equity_history(timestamp, kpis)
+    append_pos_history(timestamp, positions)
+
+    pos_rows = build_pos_rows(positions)
+    orders_rows, trailing_rows, fixed_stop_rows = build_order_rows(open_orders)
+
+    equity_labels_intraday, equity_values_intraday, daily_last_by_date = load_equity_history()
+    equity_labels_daily, equity_values_daily = daily_series(daily_last_by_date)
+    symbol_history = symbol_history_from(load_symbol_series())
+
+    trailing_detail = build_trailing_detail(trailing_rows, symbol_history)
+    protection_by_symbol = build_protection(trailing_rows, fixed_stop_rows)
+    tables = build_table_rows(pos_rows, orders_rows, trailing_rows, fixed_stop_rows,
+                              trailing_detail, protection_by_symbol)
+
+    html = render_html(timestamp, kpis, tables, equity_labels_intraday, equity_values_intraday,
+                       equity_labels_daily, equity_values_daily, symbol_history)
+    OUT_HTML.write_text(html, encoding="utf-8")
+    print(f"Wrote {OUT_HTML} (with trailing detail) and updated {HIST_EQUITY} / {HIST_POS}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# serve_dashboard.py — dashboard en vivo (local): estado en memoria + deltas por SSE
+#
+# Reutiliza la preparación de datos de build_dashboard.py, pero en vez de reescribir
+# docs/index.html mantiene el estado en memoria, lo refresca cada --interval segundos
+# y empuja a los navegadores sólo las filas cambiadas y los puntos nuevos de los gráficos.
+# No escribe en data/ ni en docs/ (eso sigue siendo trabajo del cron).
+import json, argparse, threading, queue
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from time import sleep
+
+import build_dashboard as bd
+
+HEARTBEAT_SECS = 15.0   # comentario SSE para mantener viva la conexión
+CLIENT_QUEUE_MAX = 100  # deltas pendientes por cliente; si se llena, se desconecta (recarga al volver)
+
+# --- Script cliente: aplica deltas sobre tablas/KPIs/gráficos ya renderizados ---
+LIVE_SCRIPT = """
+<script>
+let liveSeq = __SEQ__;
+const MAX_POINTS_PER_SYMBOL = __MAX_POINTS__;
+function applyTable(name, t) {
+  const body = document.getElementById('tbody_' + name);
+  if (!body) return;
+  const rows = {};
+  for (const tr of body.querySelectorAll('tr[data-key]')) rows[tr.dataset.key] = tr;
+  for (const k of t.remove || []) { if (rows[k]) { rows[k].remove(); delete rows[k]; } }
+  for (const [k, html] of Object.entries(t.upsert || {})) {
+    const tpl = document.createElement('template'); tpl.innerHTML = html.trim();
+    const tr = tpl.content.firstElementChild;
+    if (rows[k]) rows[k].replaceWith(tr); else body.appendChild(tr);
+    rows[k] = tr;
+  }
+  for (const k of t.order || []) { if (rows[k]) body.appendChild(rows[k]); }
+}
+function applyEquity(eq) {
+  for (const [t, v] of eq.intraday || []) { equityLabelsIntraday.push(t); equityValuesIntraday.push(v); }
+  if (equityLabelsIntraday.length > MAX_POINTS_PER_SYMBOL) {
+    const extra = equityLabelsIntraday.length - MAX_POINTS_PER_SYMBOL;
+    equityLabelsIntraday.splice(0, extra); equityValuesIntraday.splice(0, extra);
+  }
+  if (eq.daily) {
+    const [d, v] = eq.daily; const n = equityLabelsDaily.length;
+    if (n && equityLabelsDaily[n-1] === d) equityValuesDaily[n-1] = v;
+    else { equityLabelsDaily.push(d); equityValuesDaily.push(v); }
+  }
+  if (window.eqChart) window.eqChart.update('none');
+}
+function applySymbols(pts) {
+  for (const [sym, ser] of Object.entries(pts)) {
+    if (!symbolHistory[sym]) {
+      symbolHistory[sym] = { t: [], price: [], plpc: [] };
+      if (symbols.length === 0) symSel.innerHTML = '';
+      symbols.push(sym);
+      const opt = document.createElement('option'); opt.value = sym; opt.textContent = sym; symSel.appendChild(opt);
+      if (symbols.length === 1) { symSel.value = sym; }
+    }
+    const H = symbolHistory[sym];
+    for (const key of ['t', 'price', 'plpc']) {
+      H[key].push(...ser[key]);
+      if (H[key].length > MAX_POINTS_PER_SYMBOL) H[key].splice(0, H[key].length - MAX_POINTS_PER_SYMBOL);
+    }
+    if (sym === symSel.value) { if (symChart) symChart.update('none'); else renderSymbolChart(sym); }
+  }
+}
+const es = new EventSource('/events');
+es.addEventListener('hello', (e) => { if (JSON.parse(e.data).seq !== liveSeq) location.reload(); });
+es.addEventListener('delta', (e) => {
+  const d = JSON.parse(e.data);
+  if (d.seq !== liveSeq + 1) { location.reload(); return; }   // se perdió un delta → recargar estado completo
+  liveSeq = d.seq;
+  document.getElementById('lastUpdate').textContent = d.timestamp;
+  for (const [k, v] of Object.entries(d.kpis || {})) document.getElementById('kpi_' + k).textContent = v;
+  for (const [name, t] of Object.entries(d.tables || {})) applyTable(name, t);
+  if (d.equity) applyEquity(d.equity);
+  if (d.symbols) applySymbols(d.symbols);
+});
+</script>
+"""
+
+
+def diff_table(old_rows, new_rows):
+    """Compara dos listas (key, <tr>) y devuelve sólo lo cambiado (o None si no hay cambios)."""
+    old = dict(old_rows)
+    new = dict(new_rows)
+    new_keys = list(new)
+    delta = {}
+    upsert = {k: h for k, h in new_rows if old.get(k) != h}
+    if upsert:
+        delta["upsert"] = upsert
+    remove = [k for k in old if k not in new]
+    if remove:
+        delta["remove"] = remove
+    if [k for k, _ in old_rows] != new_keys:
+        delta["order"] = new_keys
+    return delta or None
+
+
+class LiveState:
+    """Estado del dashboard en memoria; refresh() aplica un tick y devuelve el delta."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.clients = []
+        self.timestamp = ""
+        self.kpis = None
+        self.tables = {name: [] for name in ("pos", "ord", "trail", "stop", "trail_detail")}
+        # históricos: se cargan una sola vez desde data/ y luego crecen en memoria,
+        # acotados igual que las series por símbolo (sólo alimentan los gráficos)
+        labels, values, self.daily_last_by_date = bd.load_equity_history()
+        self.equity_labels = deque(labels, maxlen=bd.MAX_POINTS_PER_SYMBOL)
+        self.equity_values = deque(values, maxlen=bd.MAX_POINTS_PER_SYMBOL)
+        self.symbol_series = bd.load_symbol_series()
+        # high-water por id de orden trailing: no depende del recorte de las series del gráfico
+        self.high_water = {}
+
+    def _seed_high_water(self, trailing_rows):
+        """High-water inicial de órdenes trailing nuevas: historia completa del CSV + serie en memoria."""
+        new = [tr for tr in trailing_rows if tr["id"] not in self.high_water and tr["trail_percent"] is not None]
+        if not new:
+            return {}
+        syms = {tr["symbol"] for tr in new}
+        full_history = bd.symbol_history_from(bd.load_symbol_series(maxlen=None), syms)
+        with self.lock:
+            live_history = bd.symbol_history_from(self.symbol_series, syms)
+        seeds = {}
+        for tr in new:
+            candidates = [bd.high_water_since(h, tr["symbol"], tr["submitted_at"]) for h in (full_history, live_history)]
+            candidates = [c for c in candidates if c is not None]
+            seeds[tr["id"]] = max(candidates) if candidates else None
+        return seeds
+
+    def refresh(self):
+        account, positions, open_orders = bd.fetch_account_data()
+        timestamp = bd.now_iso()
+        kpis = bd.account_kpis(account)
+
+        pos_rows = bd.build_pos_rows(positions)
+        orders_rows, trailing_rows, fixed_stop_rows = bd.build_order_rows(open_orders)
+        seeds = self._seed_high_water(trailing_rows)
+
+        with self.lock:
+            delta = {"timestamp": timestamp}
+
+            # KPIs: sólo los textos que cambiaron
+            kpi_txt = bd.kpi_texts(kpis)
+            old_txt = bd.kpi_texts(self.kpis) if self.kpis else {}
+            changed = {k: v for k, v in kpi_txt.items() if old_txt.get(k) != v}
+            if changed:
+                delta["kpis"] = changed
+            self.kpis = kpis
+
+            # Puntos nuevos de equity / símbolos: sólo si el valor cambió (fuera de mercado
+            # no se acumulan puntos planos)
+            if timestamp != self.timestamp:
+                pv = kpis["portfolio_value"]
+                equity = {}
+                if not self.equity_values or self.equity_values[-1] != pv:
+                    self.equity_labels.append(timestamp)
+                    self.equity_values.append(pv)
+                    equity["intraday"] = [[timestamp, pv]]
+                if self.daily_last_by_date.get(timestamp[:10]) != pv:
+                    self.daily_last_by_date[timestamp[:10]] = pv
+                    equity["daily"] = [timestamp[:10], pv]
+                if equity:
+                    delta["equity"] = equity
+
+                new_points = {}
+                for r in pos_rows:
+                    t, price, plpc = bd.series_point(timestamp, r)
+                    ser = self.symbol_series[r["symbol"]]
+                    if ser["t"] and ser["price"][-1] == price and ser["plpc"][-1] == plpc:
+                        continue
+                    ser["t"].append(t)
+                    ser["price"].append(price)
+                    ser["plpc"].append(plpc)
+                    new_points[r["symbol"]] = {"t": [t], "price": [price], "plpc": [plpc]}
+                if new_points:
+                    delta["symbols"] = new_points
+            self.timestamp = timestamp
+
+            # High-water: semilla desde la historia completa, luego max() con el precio de cada tick
+            self.high_water.update(seeds)
+            current_price = {r["symbol"]: r["current"] for r in pos_rows}
+            for tr in trailing_rows:
+                if tr["trail_percent"] is None or tr["symbol"] not in current_price:
+                    continue
+                hw = self.high_water.get(tr["id"])
+                price = current_price[tr["symbol"]]
+                self.high_water[tr["id"]] = price if hw is None else max(hw, price)
+            live_ids = {tr["id"] for tr in trailing_rows}
+            for oid in [k for k in self.high_water if k not in live_ids]:
+                del self.high_water[oid]
+            trailing_detail = [bd.trailing_detail_row(tr, self.high_water.get(tr["id"])) for tr in trailing_rows]
+            protection_by_symbol = bd.build_protection(trailing_rows, fixed_stop_rows)
+            tables = bd.build_table_rows(pos_rows, orders_rows, trailing_rows, fixed_stop_rows,
+                                         trailing_detail, protection_by_symbol)
+
+            table_deltas = {}
+            for name, rows in tables.items():
+                d = diff_table(self.tables[name], rows)
+                if d:
+                    table_deltas[name] = d
+            if table_deltas:
+                delta["tables"] = table_deltas
+            self.tables = tables
+
+            self.seq += 1
+            delta["seq"] = self.seq
+            self._broadcast("delta", delta)
+        return delta
+
+    def _broadcast(self, event, payload):
+        msg = f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+        for q in list(self.clients):
+            try:
+                q.put_nowait(msg)
+            except queue.Full:
+                # cliente atascado: se descarta; al reconectar el chequeo de seq recarga la página
+                self.clients.remove(q)
+
+    def render_page(self):
+        # copia del estado bajo el lock; el render (y el JSON de las series) fuera de él
+        with self.lock:
+            seq, timestamp, kpis, tables = self.seq, self.timestamp, self.kpis, self.tables
+            equity_labels, equity_values = list(self.equity_labels), list(self.equity_values)
+            labels_daily, values_daily = bd.daily_series(self.daily_last_by_date)
+            symbol_history = bd.symbol_history_from(self.symbol_series)
+        live_script = (LIVE_SCRIPT
+            .replace("__SEQ__", str(seq))
+            .replace("__MAX_POINTS__", str(bd.MAX_POINTS_PER_SYMBOL)))
+        return bd.render_html(timestamp, kpis, tables, equity_labels, equity_values,
+                              labels_daily, values_daily, symbol_history,
+                              footer_note="Live local server (SSE)",
+                              live_script=live_script)
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=CLIENT_QUEUE_MAX)
+        with self.lock:
+            self.clients.append(q)
+            hello = f"event: hello\ndata: {json.dumps({'seq': self.seq})}\n\n".encode("utf-8")
+        return q, hello
+
+    def is_subscribed(self, q):
+        with self.lock:
+            return q in self.clients
+
+    def unsubscribe(self, q):
+        with self.lock:
+            if q in self.clients:
+                self.clients.remove(q)
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path in ("/", "/index.html"):
+                body = state.render_page().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif path == "/events":
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                q, hello = state.subscribe()
+                try:
+                    self.wfile.write(hello)
+                    self.wfile.flush()
+                    while True:
+                        try:
+                            msg = q.get(timeout=HEARTBEAT_SECS)
+                        except queue.Empty:
+                            if not state.is_subscribed(q):
+                                break   # descartado por cola llena: cerrar para que el navegador reconecte
+                            msg = b": ping\n\n"
+                        self.wfile.write(msg)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    state.unsubscribe(q)
+            else:
+                self.send_error(404)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def refresh_loop(state, interval):
+    while True:
+        sleep(interval)
+        try:
+            delta = state.refresh()
+            print(f"[TICK] {delta['timestamp']} seq={delta['seq']} tables={sorted(delta.get('tables', {}))}")
+        except Exception as e:
+            print(f"[ERROR] refresh falló: {e}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Live local dashboard (SSE deltas)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--interval", type=float, default=15.0, help="segundos entre refrescos")
+    args = ap.parse_args()
+
+    state = LiveState()
+    state.refresh()
+    threading.Thread(target=refresh_loop, args=(state, args.interval), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    print(f"Serving live dashboard on http://{args.host}:{args.port} (refresh every {args.interval}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()